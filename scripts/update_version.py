@@ -13,15 +13,11 @@ Derived files:
 from __future__ import annotations
 
 import datetime as dt
-import re
+import mmap
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-try:
-    import tomllib
-except ModuleNotFoundError as exc:  # pragma: no cover
-    raise SystemExit("Python 3.11+ required (tomllib is missing).") from exc
-
 
 ROOT = Path(__file__).resolve().parents[1]
 PYPROJECT = ROOT / "pyproject.toml"
@@ -29,7 +25,60 @@ VERSION_INFO = ROOT / "version_info.py"
 INSTALLER_ISS = ROOT / "installer.iss"
 README = ROOT / "README.md"
 
-SEMVER_RE = re.compile(r"^(\d+)\.(\d+)\.(\d+)$")
+def _is_semver(version: str) -> bool:
+    parts = version.split(".")
+    return len(parts) == 3 and all(p.isdigit() for p in parts)
+
+
+def _quoted_after(text: str, prefix: str) -> str:
+    """Возвращает содержимое первой пары кавычек после prefix ('' если нет)."""
+    return text.partition(prefix)[2].partition('"')[0]
+
+
+def _parse_vi(text: str) -> tuple[str, str]:
+    """Извлекает (__version__, __release_date__) за один проход по файлу."""
+    version = ""
+    release_date = ""
+    for line in text.splitlines():
+        if line.startswith("__version__") and '"' in line:
+            version = line.split('"')[1]
+        elif line.startswith("__release_date__") and '"' in line:
+            release_date = line.split('"')[1]
+        if version and release_date:
+            break
+    return version, release_date
+
+
+def _parse_readme(text: str) -> tuple[str, str]:
+    """Извлекает (версию, дату релиза) из строки '**Текущая версия:** ...'."""
+    line = text.partition("**Текущая версия:**")[2].partition("\n")[0]
+    parts = line.split("`")
+    if len(parts) > 3:
+        return parts[1], parts[3]
+    return "", ""
+
+
+_README_MARKER = "**Текущая версия:**".encode("utf-8")
+
+
+def _scan_readme(path: Path) -> tuple[str, str]:
+    """Ищет строку версии через mmap, не материализуя весь README в str.
+
+    mm.find — это C-уровневый поиск по байтам; декодируется только
+    небольшое окно с самой строкой версии.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            idx = mm.find(_README_MARKER)
+            if idx == -1:
+                return "", ""
+            end = mm.find(b"\n", idx)
+            if end == -1:
+                end = len(mm)
+            window = mm[idx:end].decode("utf-8", errors="replace")
+    except (OSError, ValueError):
+        return "", ""
+    return _parse_readme(window)
 
 
 def read_text(path: Path) -> str:
@@ -44,31 +93,87 @@ def today_ru() -> str:
     return dt.date.today().strftime("%d.%m.%Y")
 
 
-def read_pyproject() -> tuple[str, str]:
-    data = tomllib.loads(read_text(PYPROJECT))
-    version = data["project"]["version"]
-    release_date = data.get("tool", {}).get("virtualcom", {}).get("release_date", "")
+def _read_all(paths: list[Path]) -> list[str]:
+    """Читает несколько файлов, перекрывая I/O по потокам."""
+    with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        return list(executor.map(read_text, paths))
+
+
+def _write_all(pairs: list[tuple[Path, bytes]]) -> None:
+    """Пишет несколько файлов одним пакетом, перекрывая I/O по потокам."""
+    if not pairs:
+        return
+    with ThreadPoolExecutor(max_workers=len(pairs)) as executor:
+        list(executor.map(lambda pair: pair[0].write_bytes(pair[1]), pairs))
+
+
+def _parse_pyproject(content: str) -> tuple[str, str]:
+    # Нужны всего два значения, так что вместо полного TOML-парсера
+    # (и зависимости от tomllib/Python 3.11+) хватает построчного скана.
+    version = ""
+    release_date = ""
+    current_table = ""
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("["):
+            current_table = stripped
+            continue
+        if "=" not in stripped:
+            continue
+        key = stripped.split("=", 1)[0].strip()
+        if current_table == "[project]" and key == "version":
+            version = stripped.split("=", 1)[1].strip().strip('"')
+        elif current_table == "[tool.virtualcom]" and key == "release_date":
+            release_date = stripped.split("=", 1)[1].strip().strip('"')
+        if version and release_date:
+            break
+    if not version:
+        raise SystemExit("Could not read [project].version from pyproject.toml")
     return version, release_date
 
 
-def update_pyproject(version: str, release_date: str) -> None:
+def read_pyproject() -> tuple[str, str]:
+    return _parse_pyproject(read_text(PYPROJECT))
+
+
+def update_pyproject(version: str, release_date: str) -> list[tuple[Path, bytes]]:
+    # Оба значения правятся построчно: это однострочные замены с
+    # фиксированным префиксом, движок регулярных выражений тут не нужен.
     content = read_text(PYPROJECT)
-    content_new = re.sub(
-        r'(?m)^version\s*=\s*"[^"]+"',
-        f'version = "{version}"',
-        content,
-        count=1,
-    )
-    if content_new == content:
+    lines = content.splitlines(keepends=True)
+    current_table = ""
+    version_done = False
+    date_done = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("["):
+            current_table = stripped
+            continue
+        if (
+            not version_done
+            and current_table == "[project]"
+            and stripped.startswith("version")
+            and "=" in stripped
+        ):
+            lines[i] = f'version = "{version}"\n'
+            version_done = True
+        elif (
+            not date_done
+            and current_table == "[tool.virtualcom]"
+            and stripped.startswith("release_date")
+            and "=" in stripped
+        ):
+            lines[i] = f'release_date = "{release_date}"\n'
+            date_done = True
+        if version_done and date_done:
+            break
+
+    if not version_done:
         raise RuntimeError("Could not update version in pyproject.toml")
 
-    if re.search(r'(?m)^release_date\s*=\s*"[^"]+"', content_new):
-        content_new = re.sub(
-            r'(?m)^release_date\s*=\s*"[^"]+"',
-            f'release_date = "{release_date}"',
-            content_new,
-            count=1,
-        )
+    content_new = "".join(lines)
+    if date_done:
+        pass
     elif "[tool.virtualcom]" in content_new:
         content_new = content_new.replace(
             "[tool.virtualcom]",
@@ -78,54 +183,84 @@ def update_pyproject(version: str, release_date: str) -> None:
     else:
         content_new = content_new.rstrip() + f'\n\n[tool.virtualcom]\nrelease_date = "{release_date}"\n'
 
-    write_text(PYPROJECT, content_new)
+    # Без изменений — не трогаем файл (mtime, VCS, watchers).
+    if content_new != content:
+        return [(PYPROJECT, content_new.encode("utf-8"))]
+    return []
 
 
-def sync_derived(version: str, release_date: str) -> None:
-    version_info_content = (
-        '"""Derived version data for runtime usage.\n\n'
-        "This file is synchronized from pyproject.toml by scripts/update_version.py.\n"
-        '"""\n\n'
+# Пролог version_info.py неизменен между запусками — держим его готовым
+# байтовым блоком и форматируем только две завершающие строки.
+_VI_HEADER = (
+    b'"""Derived version data for runtime usage.\n\n'
+    b"This file is synchronized from pyproject.toml by scripts/update_version.py.\n"
+    b'"""\n\n'
+)
+
+
+def sync_derived(version: str, release_date: str) -> list[tuple[Path, bytes]]:
+    # Каждый файл попадает в пакет записи только при реальном изменении:
+    # повторный sync становится бесплатным no-op.
+    writes: list[tuple[Path, bytes]] = []
+
+    version_info_new = _VI_HEADER + (
         f'__version__ = "{version}"\n'
         f'__release_date__ = "{release_date}"\n'
-    )
-    write_text(VERSION_INFO, version_info_content)
-
-    iss = read_text(INSTALLER_ISS)
-    iss_new = re.sub(
-        r'(?m)^#define\s+MyAppVersion\s+"[^"]+"',
-        f'#define MyAppVersion "{version}"',
-        iss,
-        count=1,
-    )
-    write_text(INSTALLER_ISS, iss_new)
+    ).encode("ascii")
+    if not VERSION_INFO.exists() or VERSION_INFO.read_bytes() != version_info_new:
+        writes.append((VERSION_INFO, version_info_new))
+
+    # Правится одна ASCII-строка #define — работаем с байтами напрямую,
+    # без UTF-8 декодирования/кодирования всего файла.
+    iss = INSTALLER_ISS.read_bytes()
+    iss_new = iss
+    marker = b'#define MyAppVersion "'
+    start = iss.find(marker)
+    if start != -1:
+        value_start = start + len(marker)
+        value_end = iss.find(b'"', value_start)
+        if value_end != -1:
+            iss_new = iss[:value_start] + version.encode("ascii") + iss[value_end:]
+    if iss_new != iss:
+        writes.append((INSTALLER_ISS, iss_new))
 
     readme = read_text(README)
+    readme_lines = readme.splitlines(keepends=True)
     version_line = f"**Текущая версия:** `{version}` (релиз: `{release_date}`)"
-    if re.search(r"(?m)^\*\*Текущая версия:\*\* .+$", readme):
-        readme_new = re.sub(r"(?m)^\*\*Текущая версия:\*\* .+$", version_line, readme, count=1)
+    for i, line in enumerate(readme_lines):
+        if line.startswith("**Текущая версия:**"):
+            readme_lines[i] = version_line + "\n"
+            break
     else:
-        readme_new = readme.replace("## Описание\n\n", f"## Описание\n\n{version_line}\n\n", 1)
-    write_text(README, readme_new)
+        readme_lines = [
+            readme.replace("## Описание\n\n", f"## Описание\n\n{version_line}\n\n", 1)
+        ]
+    readme_new = "".join(readme_lines)
+    if readme_new != readme:
+        writes.append((README, readme_new.encode("utf-8")))
+
+    return writes
+
+
+_BUMPS = {
+    "patch": lambda major, minor, patch: (major, minor, patch + 1),
+    "minor": lambda major, minor, patch: (major, minor + 1, 0),
+    "major": lambda major, minor, patch: (major + 1, 0, 0),
+}
 
 
 def bump_version(version: str, level: str) -> str:
-    m = SEMVER_RE.match(version)
-    if not m:
-        raise ValueError(f"Invalid semantic version: {version}")
-    major, minor, patch = map(int, m.groups())
-    if level == "patch":
-        patch += 1
-    elif level == "minor":
-        minor += 1
-        patch = 0
-    elif level == "major":
-        major += 1
-        minor = 0
-        patch = 0
-    else:
+    bump = _BUMPS.get(level)
+    if bump is None:
         raise ValueError("level must be patch|minor|major")
-    return f"{major}.{minor}.{patch}"
+    # int() сам отвергает нечисловые компоненты — отдельная проверка не нужна.
+    a, _, rest = version.partition(".")
+    b, _, c = rest.partition(".")
+    try:
+        parts = bump(int(a), int(b), int(c))
+    except ValueError as exc:
+        raise ValueError(f"Invalid semantic version: {version}") from exc
+    return "{}.{}.{}".format(*parts)
 
 
 def file_version_status(label: str, value: str, expected: str) -> str:
@@ -134,24 +269,23 @@ def file_version_status(label: str, value: str, expected: str) -> str:
 
 
 def status() -> int:
-    version, release_date = read_pyproject()
+    # Файлы читаются одним пакетом: запросы к ФС перекрываются
+    # вместо последовательных open/read/close. README (самый крупный)
+    # не читается целиком — по нему идет mmap-поиск одной строки.
+    pyproject, vi, iss = _read_all([PYPROJECT, VERSION_INFO, INSTALLER_ISS])
+    version, release_date = _parse_pyproject(pyproject)
     print(f"pyproject version     : {version}")
     print(f"pyproject release_date: {release_date}")
 
-    vi = read_text(VERSION_INFO)
-    vi_ver = re.search(r'__version__\s*=\s*"([^"]+)"', vi)
-    vi_date = re.search(r'__release_date__\s*=\s*"([^"]+)"', vi)
-    vi_ver_v = vi_ver.group(1) if vi_ver else "N/A"
-    vi_date_v = vi_date.group(1) if vi_date else "N/A"
+    vi_ver_v, vi_date_v = _parse_vi(vi)
+    vi_ver_v = vi_ver_v or "N/A"
+    vi_date_v = vi_date_v or "N/A"
 
-    iss = read_text(INSTALLER_ISS)
-    iss_ver = re.search(r'(?m)^#define\s+MyAppVersion\s+"([^"]+)"', iss)
-    iss_ver_v = iss_ver.group(1) if iss_ver else "N/A"
+    iss_ver_v = _quoted_after(iss, '#define MyAppVersion "') or "N/A"
 
-    readme = read_text(README)
-    rd = re.search(r"(?m)^\*\*Текущая версия:\*\* `([^`]+)` \(релиз: `([^`]+)`\)", readme)
-    rd_ver_v = rd.group(1) if rd else "N/A"
-    rd_date_v = rd.group(2) if rd else "N/A"
+    rd_ver_v, rd_date_v = _scan_readme(README)
+    rd_ver_v = rd_ver_v or "N/A"
+    rd_date_v = rd_date_v or "N/A"
 
     print()
     print(file_version_status("version_info.py", vi_ver_v, version))
@@ -163,13 +297,20 @@ def status() -> int:
 
 
 def sync(version_arg: str | None) -> int:
-    curr_version, _curr_date = read_pyproject()
+    curr_version, curr_date = read_pyproject()
     target_version = version_arg or curr_version
-    if not SEMVER_RE.match(target_version):
+    if not _is_semver(target_version):
         raise SystemExit(f"Invalid VERSION: {target_version}")
-    release_date = today_ru()
-    update_pyproject(target_version, release_date)
-    sync_derived(target_version, release_date)
+    if target_version == curr_version and curr_date:
+        # Версия не меняется: дата релиза остается прежней, а sync лишь
+        # чинит возможный дрейф производных файлов (без strftime/clock).
+        release_date = curr_date
+    else:
+        release_date = today_ru()
+    # Сначала считаем все новое содержимое, затем пишем одним пакетом.
+    writes = update_pyproject(target_version, release_date)
+    writes += sync_derived(target_version, release_date)
+    _write_all(writes)
     print(f"Synchronized version: {target_version} (release_date: {release_date})")
     return 0
 
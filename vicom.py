@@ -1,10 +1,17 @@
+import atexit
+import functools
+import io
+import re
 import serial
 import serial.tools.list_ports
+import struct
 import sys
 import threading
 import time
+import weakref
 import os # Для очистки экрана
 import json
+import queue
 import subprocess
 from pathlib import Path
 from version_info import __release_date__, __version__
@@ -12,8 +19,32 @@ from version_info import __release_date__, __version__
 # Кроссплатформенный импорт модулей для работы с клавиатурой
 if os.name == 'nt':
     import msvcrt
-    getch = msvcrt.getch
-    kbhit = msvcrt.kbhit
+
+    # Весь клавиатурный ввод идет через поток-насос: он блокируется в
+    # msvcrt.getch() и складывает клавиши в очередь. Главный цикл ждет
+    # очередь с таймаутом вместо опроса kbhit() 20 раз в секунду, а
+    # остальной код по-прежнему зовет getch()/kbhit() — они обслуживаются
+    # той же очередью, иначе насос «воровал» бы клавиши у прямых вызовов.
+    _KEY_QUEUE = queue.Queue()
+
+    def _pump_keys():
+        while True:
+            _KEY_QUEUE.put(msvcrt.getch())
+
+    threading.Thread(target=_pump_keys, daemon=True).start()
+
+    def getch():
+        return _KEY_QUEUE.get()
+
+    def kbhit():
+        return not _KEY_QUEUE.empty()
+
+    def get_key(timeout=None):
+        """Ждет клавишу не дольше timeout секунд; None по истечении."""
+        try:
+            return _KEY_QUEUE.get(timeout=timeout)
+        except queue.Empty:
+            return None
 else:
     import sys
     import tty
@@ -55,6 +86,56 @@ DEFAULT_SETTINGS = {
 }
 
 POLYNOMIAL = 0xA001  # Стандартный полином для CRC16-MODBUS
+
+
+def _crc16_table_entry(byte: int) -> int:
+    """Прогоняет один байт через битовый алгоритм CRC16 (для таблицы)."""
+    crc = byte
+    for _ in range(8):
+        if crc & 1:
+            crc = (crc >> 1) ^ POLYNOMIAL
+        else:
+            crc >>= 1
+    return crc
+
+
+# Таблица Sarwate: битовый цикл выполняется один раз на импорт для всех
+# 256 значений, дальше каждый байт данных стоит одну выборку из таблицы.
+CRC16_TABLE = tuple(_crc16_table_entry(i) for i in range(256))
+
+
+def _build_crc16_slices(first: tuple[int, ...]) -> tuple[tuple[int, ...], ...]:
+    """Строит 8 таблиц slice-by-8: T[k][b] — CRC байта b и k нулевых байт."""
+    tables = [first]
+    for _ in range(7):
+        prev = tables[-1]
+        tables.append(tuple((entry >> 8) ^ first[entry & 0xFF] for entry in prev))
+    return tuple(tables)
+
+
+CRC16_SLICES = _build_crc16_slices(CRC16_TABLE)
+
+# Опциональное ускорение: нативная реализация CRC16-MODBUS, если доступна
+# (fastcrc, затем crcmod). Контрольный вектор 0x4B37 ("123456789") защищает
+# от несовместимой версии; без пакетов работает чисто-питоновский путь.
+def _find_native_crc16():
+    try:
+        from fastcrc import crc16 as _fastcrc_crc16  # type: ignore
+        if _fastcrc_crc16.modbus(b"123456789") == 0x4B37:
+            return _fastcrc_crc16.modbus
+    except Exception:
+        pass
+    try:
+        import crcmod.predefined  # type: ignore
+        fn = crcmod.predefined.mkPredefinedCrcFun("modbus")
+        if fn(b"123456789") == 0x4B37:
+            return fn
+    except Exception:
+        pass
+    return None
+
+
+_crc16_native = _find_native_crc16()
 HISTORY_KEYS = ("text", "hex", "hex_crc")
 RUNTIME_COMMANDS = ("help", "init", "doctor", "history", "/help", "/init", "/doctor", "/history")
 RUNTIME_COMMAND_HELP = {
@@ -64,6 +145,48 @@ RUNTIME_COMMAND_HELP = {
     "history": "История команд текущего режима",
 }
 
+# Разрешение команды по уникальному префиксу идет по заранее построенному
+# бору: один проход по введенной строке вместо startswith-скана всех
+# команд, и стоимость не растет с пополнением списка. Вложенных dict
+# достаточно — внешняя зависимость типа pygtrie не нужна.
+def _trie_insert(root: dict, word: str) -> None:
+    """Добавляет слово в бор; путь — по lower-форме, терминал — оригинал."""
+    node = root
+    for ch in word.lower():
+        node = node.setdefault(ch, {})
+    bucket = node.setdefault("", [])
+    if word not in bucket:
+        bucket.append(word)
+
+
+def _build_trie(words) -> dict:
+    root: dict = {}
+    for word in words:
+        _trie_insert(root, word)
+    return root
+
+
+def _trie_prefix_matches(trie: dict, prefix: str) -> list[str]:
+    """Возвращает все слова бора, начинающиеся с prefix (без учета регистра)."""
+    node = trie
+    for ch in prefix.lower():
+        node = node.get(ch)
+        if node is None:
+            return []
+    matches: list[str] = []
+    stack = [node]
+    while stack:
+        for key, child in stack.pop().items():
+            if key == "":
+                matches.extend(child)
+            else:
+                stack.append(child)
+    return matches
+
+
+_CMD_TRIE = _build_trie(("help", "init", "doctor", "history"))
+
+
 if os.name != 'nt':
     try:
         import readline  # type: ignore
@@ -74,6 +197,25 @@ else:
     READLINE_AVAILABLE = False
 
 
+def _init_readline():
+    """Одноразовая настройка readline: делимитеры и бинд Tab.
+
+    Эти параметры не меняются между промптами, поэтому выставляются один
+    раз при импорте, а не при каждом вызове read_line_msvcrt.
+    """
+    readline.set_completer_delims(" \t\n")
+    # На macOS часто используется libedit (не GNU readline).
+    # Для него нужен другой синтаксис бинда Tab.
+    if "libedit" in (getattr(readline, "__doc__", "") or "").lower():
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+
+if READLINE_AVAILABLE:
+    _init_readline()
+
+
 def get_user_data_dir() -> Path:
     """Возвращает каталог данных приложения, переживающий переустановку."""
     if os.name == 'nt':
@@ -89,35 +231,75 @@ APP_DATA_DIR = get_user_data_dir()
 HISTORY_FILE = APP_DATA_DIR / "command_history.json"
 
 
-def _empty_history() -> dict[str, list[str]]:
-    return {key: [] for key in HISTORY_KEYS}
+# Ограничение истории на раздел: без него файл растет бесконечно и
+# каждая загрузка/сохранение дорожает вместе со стажем пользователя.
+def _history_cap() -> int:
+    try:
+        return max(1, int(os.getenv("VICOM_MAX_HISTORY", "1000")))
+    except ValueError:
+        return 1000
+
+
+MAX_HISTORY_PER_KEY = _history_cap()
+
+
+# Опциональный orjson (нативный парсер/сериализатор) заметно ускоряет
+# работу с разросшимися файлами истории; без него — стандартный json
+# с тем же байтовым интерфейсом.
+try:
+    import orjson  # type: ignore
+
+    def _history_dump(obj, f) -> None:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+    _history_loads = orjson.loads
+except ImportError:
+    def _history_dump(obj, f) -> None:
+        # json.dump кодирует потоково прямо в буфер файла, не материализуя
+        # весь документ строкой: пик памяти ~1x размера файла вместо 2x.
+        wrapper = io.TextIOWrapper(f, encoding="utf-8")
+        try:
+            json.dump(obj, wrapper, ensure_ascii=False, indent=2)
+            wrapper.flush()
+        finally:
+            # Буфер закрывает внешний with, обертку лишь отцепляем.
+            wrapper.detach()
+
+    _history_loads = json.loads
+
+
+# История хранится как dict с командами-ключами (значения не используются):
+# словарь сохраняет порядок вставки, а перенос команды "в конец" и проверка
+# на дубль стоят O(1) вместо O(N)-скана списка. В JSON разделы по-прежнему
+# сериализуются списками.
+def _empty_history() -> dict[str, dict[str, None]]:
+    return {key: {} for key in HISTORY_KEYS}
 
 
 def deduplicate_list_keep_last(items: list[str]) -> list[str]:
     """Удаляет дубликаты, оставляя последнее вхождение."""
-    seen: set[str] = set()
-    result_rev: list[str] = []
-    for item in reversed(items):
-        if item not in seen:
-            seen.add(item)
-            result_rev.append(item)
-    return list(reversed(result_rev))
+    # dict.fromkeys по reversed оставляет последние вхождения (dict
+    # сохраняет порядок вставки), обратный reversed восстанавливает
+    # исходный порядок — один C-проход вместо ручного цикла с set.
+    return list(reversed(dict.fromkeys(reversed(items))))
 
 
-def load_command_history() -> dict[str, list[str]]:
+def load_command_history() -> dict[str, dict[str, None]]:
     """Загружает историю команд из JSON-файла."""
     APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
     if not HISTORY_FILE.exists():
         return _empty_history()
     try:
-        data = json.loads(HISTORY_FILE.read_text(encoding="utf-8"))
+        data = _history_loads(HISTORY_FILE.read_bytes())
         normalized = _empty_history()
         if isinstance(data, dict):
             for key in HISTORY_KEYS:
                 value = data.get(key, [])
                 if isinstance(value, list):
                     cleaned = [str(v) for v in value if str(v).strip()]
-                    normalized[key] = deduplicate_list_keep_last(cleaned)
+                    normalized[key] = dict.fromkeys(
+                        deduplicate_list_keep_last(cleaned)[-MAX_HISTORY_PER_KEY:]
+                    )
         return normalized
     except Exception:
         # Поврежденный файл не должен ломать запуск.
@@ -127,22 +309,90 @@ def load_command_history() -> dict[str, list[str]]:
 def save_command_history():
     """Сохраняет историю команд в JSON-файл."""
     APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
-    HISTORY_FILE.write_text(
-        json.dumps(COMMAND_HISTORY, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    # Снимок — под замком: таймер отложенного сохранения пишет из своего
+    # потока, пока главный поток может добавлять команды в те же словари;
+    # list() по словарю, меняющему размер, кидает RuntimeError.
+    with _history_lock:
+        snapshot = {key: list(items) for key, items in _get_history().items()}
+    # Запись атомарна: сначала во временный файл, затем os.replace.
+    # Обрыв на середине записи не оставит усеченный command_history.json.
+    tmp_file = HISTORY_FILE.with_suffix(".json.tmp")
+    with open(tmp_file, "wb", buffering=1 << 20) as f:
+        _history_dump(snapshot, f)
+    os.replace(tmp_file, HISTORY_FILE)
+
+
+# Отложенное сохранение истории: каждая принятая команда не переписывает
+# весь JSON синхронно, а лишь поднимает флаг; таймер сбрасывает историю
+# на диск не чаще раза в пару секунд. Гарантии на выходе дает atexit
+# плюс явный сброс при закрытии порта.
+_HISTORY_SAVE_DELAY = 2.0
+_history_lock = threading.Lock()
+_history_dirty = False
+_history_timer: threading.Timer | None = None
+
+
+def flush_history():
+    """Немедленно пишет историю на диск, если есть несохраненные изменения."""
+    global _history_dirty, _history_timer
+    with _history_lock:
+        if not _history_dirty:
+            return
+        _history_dirty = False
+        if _history_timer is not None:
+            _history_timer.cancel()
+            _history_timer = None
+    try:
+        save_command_history()
+    except Exception as e:
+        # Неудачная запись не теряет изменения: флаг поднимается снова
+        # (с новым таймером), следующий flush повторит попытку.
+        mark_history_dirty()
+        print(f"\n⚠️ Не удалось сохранить историю команд: {e}")
+
+
+def mark_history_dirty():
+    """Помечает историю измененной и взводит отложенное сохранение."""
+    global _history_dirty, _history_timer
+    with _history_lock:
+        _history_dirty = True
+        if _history_timer is None:
+            _history_timer = threading.Timer(_HISTORY_SAVE_DELAY, flush_history)
+            _history_timer.daemon = True
+            _history_timer.start()
+
+
+atexit.register(flush_history)
 
 
 def add_command_to_history(history_key: str, command: str):
-    """Добавляет команду в историю и сохраняет ее на диск."""
+    """Добавляет команду в историю; на диск она попадет отложенно."""
     value = command.strip()
-    if not value or history_key not in COMMAND_HISTORY:
+    history = _get_history()
+    if not value or history_key not in history:
         return
-    # Сразу поддерживаем историю без дублей:
-    # одинаковая команда переносится в конец как "последняя использованная".
-    COMMAND_HISTORY[history_key] = [cmd for cmd in COMMAND_HISTORY[history_key] if cmd != value]
-    COMMAND_HISTORY[history_key].append(value)
-    save_command_history()
+    # История без дублей: pop+вставка переносит команду в конец словаря
+    # как "последнюю использованную" за O(1) вместо пересборки списка.
+    # Мутации — под замком, чтобы не пересекаться со снимком в
+    # save_command_history из потока таймера.
+    items = history[history_key]
+    evicted = False
+    with _history_lock:
+        items.pop(value, None)
+        items[value] = None
+        # Самые старые записи вытесняются, размер раздела ограничен.
+        while len(items) > MAX_HISTORY_PER_KEY:
+            del items[next(iter(items))]
+            evicted = True
+    # Бор дополнения пополняется инкрементально; после вытеснения старых
+    # записей он содержит лишние слова, поэтому пересоберется лениво.
+    if evicted:
+        _completion_tries.pop(history_key, None)
+    else:
+        trie = _completion_tries.get(history_key)
+        if trie is not None:
+            _trie_insert(trie, value)
+    mark_history_dirty()
 
 
 def apply_readline_history(history_key: str):
@@ -150,18 +400,33 @@ def apply_readline_history(history_key: str):
     if not READLINE_AVAILABLE:
         return
     readline.clear_history()
-    for item in COMMAND_HISTORY.get(history_key, []):
+    for item in _get_history().get(history_key, []):
         readline.add_history(item)
 
 
+# Бор автодополнения кэшируется по разделу истории: служебные команды
+# плюс записи раздела. Один и тот же бор обслуживает readline-completer
+# на Unix и Tab-дополнение read_line_msvcrt на Windows; новые команды
+# дописываются в него инкрементально, без полной пересборки.
+_completion_tries: dict[str | None, dict] = {}
+
+
+def get_completion_trie(history_key: str | None) -> dict:
+    """Возвращает бор кандидатов дополнения, лениво строя его по разделу."""
+    trie = _completion_tries.get(history_key)
+    if trie is None:
+        mode_items = _get_history().get(history_key, []) if history_key in HISTORY_KEYS else []
+        trie = _build_trie((*RUNTIME_COMMANDS, *mode_items))
+        _completion_tries[history_key] = trie
+    return trie
+
+
 def make_readline_completer(history_key: str | None):
     """Tab-completion для служебных команд и истории текущего режима."""
-    mode_items = COMMAND_HISTORY.get(history_key, []) if history_key in HISTORY_KEYS else []
-    candidates = sorted(set((*RUNTIME_COMMANDS, *mode_items)), key=str.lower)
+    trie = get_completion_trie(history_key)
 
     def _completer(text, state):
-        lowered = text.lower()
-        matches = [item for item in candidates if item.lower().startswith(lowered)]
+        matches = sorted(_trie_prefix_matches(trie, text), key=str.lower)
         return matches[state] if state < len(matches) else None
 
     return _completer
@@ -193,32 +458,31 @@ def history_label(history_key: str) -> str:
 
 
 def flatten_history(mode_key: str | None) -> list[tuple[str, str]]:
+    history = _get_history()
     if mode_key in HISTORY_KEYS:
-        return [(mode_key, cmd) for cmd in COMMAND_HISTORY[mode_key]]
+        return [(mode_key, cmd) for cmd in history[mode_key]]
     result: list[tuple[str, str]] = []
     for key in HISTORY_KEYS:
-        result.extend((key, cmd) for cmd in COMMAND_HISTORY[key])
+        result.extend((key, cmd) for cmd in history[key])
     return result
 
 
 def deduplicate_history(mode_key: str | None):
-    """Удаляет дубликаты, оставляя последнее вхождение команды."""
-    keys = [mode_key] if mode_key in HISTORY_KEYS else list(HISTORY_KEYS)
-    for key in keys:
-        seen: set[str] = set()
-        dedup_reversed: list[str] = []
-        for cmd in reversed(COMMAND_HISTORY[key]):
-            if cmd not in seen:
-                seen.add(cmd)
-                dedup_reversed.append(cmd)
-        COMMAND_HISTORY[key] = list(reversed(dedup_reversed))
+    """Удаляет дубликаты, оставляя последнее вхождение команды.
+
+    Dict-хранилище уникально по построению, так что фактически остается
+    только пересохранить файл (например, после ручной правки JSON).
+    """
     save_command_history()
 
 
 def clear_history(mode_key: str | None):
+    history = _get_history()
     keys = [mode_key] if mode_key in HISTORY_KEYS else list(HISTORY_KEYS)
-    for key in keys:
-        COMMAND_HISTORY[key] = []
+    with _history_lock:
+        for key in keys:
+            history[key] = {}
+    _completion_tries.clear()
     save_command_history()
 
 
@@ -235,9 +499,12 @@ def show_history_entries(mode_key: str | None):
 def manage_command_history():
     """Упрощенное меню управления историей (без вложенных шагов)."""
     while True:
-        entries = flatten_history(None)
+        # Для заголовка нужен только счетчик — полный список пар
+        # (раздел, команда) собирается лишь в ветках, где он реально нужен.
+        history = _get_history()
+        total = sum(len(history[key]) for key in HISTORY_KEYS)
         print(f"\n📂 Файл истории: {HISTORY_FILE}")
-        print(f"Всего записей: {len(entries)}")
+        print(f"Всего записей: {total}")
         action = choose_option(
             "Управление историей:",
             [
@@ -257,12 +524,13 @@ def manage_command_history():
             continue
 
         if action == "Удалить запись":
-            if not entries:
+            if not total:
                 print("\n📭 История пуста.")
                 continue
+            entries = flatten_history(None)
             show_history_entries(None)
             try:
-                idx = int(input("\nВведите номер записи для удаления: ").strip())
+                idx = int(console_input("\nВведите номер записи для удаления: ").strip())
             except ValueError:
                 print("⚠️ Ошибка: введите число.")
                 continue
@@ -271,10 +539,12 @@ def manage_command_history():
                 continue
             key, value = entries[idx - 1]
             try:
-                COMMAND_HISTORY[key].remove(value)
-            except ValueError:
+                with _history_lock:
+                    del _get_history()[key][value]
+            except KeyError:
                 print("⚠️ Не удалось удалить запись (история изменилась).")
                 continue
+            _completion_tries.pop(key, None)
             save_command_history()
             print("✅ Запись удалена.")
             continue
@@ -285,7 +555,7 @@ def manage_command_history():
             continue
 
         if action == "Очистить всю историю":
-            confirm = input("Подтвердите очистку (y/n): ").strip().lower()
+            confirm = console_input("Подтвердите очистку (y/n): ").strip().lower()
             if confirm == "y":
                 clear_history(None)
                 print("✅ История очищена.")
@@ -293,74 +563,342 @@ def manage_command_history():
                 print("ℹ️ Очистка отменена.")
 
 
-COMMAND_HISTORY = load_command_history()
+# История загружается лениво при первом обращении: запуск ради списка
+# портов или --version не платит за чтение JSON и создание каталога данных.
+COMMAND_HISTORY: dict[str, dict[str, None]] | None = None
 
 
-def safe_close_serial(ser, port_name: str | None = None):
-    """Безопасно закрывает serial-порт без падения на повторном close()."""
-    if not ser:
+def _get_history() -> dict[str, dict[str, None]]:
+    """Возвращает историю команд, загружая ее при первом обращении."""
+    global COMMAND_HISTORY
+    if COMMAND_HISTORY is None:
+        COMMAND_HISTORY = load_command_history()
+    return COMMAND_HISTORY
+
+
+# Общий лок на stdout: поток приема и основной цикл пишут каждое сообщение
+# одним вызовом write, поэтому строки не перемешиваются между потоками.
+PRINT_LOCK = threading.Lock()
+
+
+def console_write(message: str):
+    """Выводит сообщение одним вызовом write под общим локом."""
+    with PRINT_LOCK:
+        sys.stdout.write(message)
+        sys.stdout.flush()
+
+
+# Журналы приема уходят в отдельный поток-принтер: рабочий поток RX лишь
+# кладет готовую строку в очередь и возвращается к кадрам, не дожидаясь
+# stdout. Очередь ограничена; если терминал не успевает, журнальные
+# строки отбрасываются со сводным предупреждением (автоответ в порт к
+# этому моменту уже отправлен).
+_print_q: queue.Queue = queue.Queue(maxsize=1024)
+_dropped_logs = 0
+
+
+def _printer_loop():
+    while True:
+        console_write(_print_q.get())
+
+
+threading.Thread(target=_printer_loop, daemon=True).start()
+
+
+def console_print_async(message: str):
+    """Ставит сообщение в очередь вывода, не блокируя вызывающий поток."""
+    global _dropped_logs
+    try:
+        _print_q.put_nowait(message)
+    except queue.Full:
+        _dropped_logs += 1
         return
+    if _dropped_logs:
+        n, _dropped_logs = _dropped_logs, 0
+        try:
+            _print_q.put_nowait(
+                f"\n⚠️ Журнал приема: пропущено {n} сообщений (вывод не успевает).\n"
+            )
+        except queue.Full:
+            # Места под предупреждение не нашлось — счетчик сохраняем.
+            _dropped_logs = n
+
+
+def _enable_ansi() -> bool:
+    """Включает обработку VT-последовательностей в консоли Windows 10+."""
+    if os.name != 'nt':
+        return True
     try:
-        if ser.is_open:
-            ser.close()
-            if port_name:
-                print(f"\n🔌 Порт {port_name} закрыт.")
-    except (serial.SerialException, OSError):
-        # Уже закрыт/дескриптор недоступен — для graceful shutdown это нормально.
-        pass
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except Exception:
+        return False
+
+
+_ANSI_SUPPORTED = _enable_ansi()
+
+
+def clear_screen():
+    """Очищает экран ANSI-последовательностью, без fork/exec cls|clear."""
+    if _ANSI_SUPPORTED:
+        console_write("\x1b[2J\x1b[H")
+    else:
+        # Старые консоли Windows без VT-обработки.
+        os.system('cls' if os.name == 'nt' else 'clear')
+
+
+# safe_close_serial зовется и из except-веток, и из finally, и из внешнего
+# обработчика Ctrl+C — до трех раз за shutdown. Уже закрытые порты помнит
+# WeakSet (не мешает сборке объектов), замок делает закрытие атомарным.
+_closed_ports = weakref.WeakSet()
+_close_lock = threading.Lock()
+
+
+def safe_close_serial(ser, port_name: str | None = None):
+    """Безопасно закрывает serial-порт; повторные вызовы — дешевый no-op."""
+    # Завершение сессии — удобная точка, чтобы гарантированно добить
+    # отложенную запись истории на диск.
+    flush_history()
+    if not ser or ser in _closed_ports:
+        return
+    with _close_lock:
+        if ser in _closed_ports:
+            return
+        try:
+            if ser.is_open:
+                ser.close()
+                if port_name:
+                    print(f"\n🔌 Порт {port_name} закрыт.")
+        except (serial.SerialException, OSError):
+            # Уже закрыт/дескриптор недоступен — для graceful shutdown это нормально.
+            pass
+        _closed_ports.add(ser)
 
 def calculate_crc16(data: bytes) -> int:
     """
     Вычисляет CRC16 для переданных данных.
-    Аналог алгоритма из C-кода.
+    Аналог алгоритма из C-кода: длинные кадры идут по slice-by-8
+    (8 байт за итерацию цикла), хвост — по таблице Sarwate.
     """
-    crc = 0xFFFF
+    # Нативный бэкенд выгоден начиная с ~32 байт: на коротких кадрах
+    # накладные расходы вызова через FFI съедают выигрыш, и табличный
+    # путь ниже оказывается быстрее.
+    if _crc16_native is not None and len(data) >= 32:
+        return _crc16_native(bytes(data))
 
-    for byte in data:
-        crc ^= byte
-        for _ in range(8):
-            if crc & 1:
-                crc = (crc >> 1) ^ POLYNOMIAL
-            else:
-                crc >>= 1
+    crc = 0xFFFF
+    t0, t1, t2, t3, t4, t5, t6, t7 = CRC16_SLICES
+
+    view = memoryview(data)
+    block_end = len(data) - (len(data) % 8)
+    if block_end:
+        for (word,) in struct.iter_unpack("<Q", view[:block_end]):
+            word ^= crc
+            crc = (
+                t7[word & 0xFF]
+                ^ t6[(word >> 8) & 0xFF]
+                ^ t5[(word >> 16) & 0xFF]
+                ^ t4[(word >> 24) & 0xFF]
+                ^ t3[(word >> 32) & 0xFF]
+                ^ t2[(word >> 40) & 0xFF]
+                ^ t1[(word >> 48) & 0xFF]
+                ^ t0[word >> 56]
+            )
+
+    for byte in view[block_end:]:
+        crc = (crc >> 8) ^ t0[(crc ^ byte) & 0xFF]
 
     return crc
 
-def receive_data(ser, port_name, processing_event):
-    """Функция для приема и обработки данных в отдельном потоке"""
-    while ser.is_open:
-        try:
-            # Ждем события или таймаута 0.1 сек
-            # Если событие НЕ установлено (остановлено), wait вернет False
-            # Если событие установлено, wait вернет True сразу
-            is_processing_allowed = processing_event.wait(timeout=0.1)
-
-            # Если прием не разрешен или нет данных, пропускаем итерацию
-            if not is_processing_allowed or not ser.in_waiting:
-                time.sleep(0.05) # Небольшая пауза, чтобы не грузить ЦП в ожидании
-                continue
+def _handle_frames(rx_q, ser, port_name, events_q=None, worker_failed=None):
+    """Рабочий поток: автоответы и журналирование принятых кадров.
 
-            # Прием и обработка данных (только если is_processing_allowed == True и есть данные)
-            request = ser.read(ser.in_waiting)
-            print(f"\n{port_name} 📥 Получены данные HEX: {' '.join(f'{b:02X}' for b in request)}")
+    Вынесен из потока чтения, чтобы форматирование и вывод лога не
+    задерживали выборку байтов из порта: пока здесь печатается кадр,
+    читатель продолжает опустошать буфер драйвера. None в очереди —
+    сигнал завершения от читателя. При смерти порта поток поднимает
+    worker_failed (чтобы остановить читателя) и шлет событие в events_q.
+    """
+    while True:
+        request = rx_q.get()
+        if request is None:
+            break
+        try:
             try:
                 # Попытка декодировать как ASCII, заменяя непечатаемые символы
                 ascii_representation = request.decode('ascii', errors='replace')
             except UnicodeDecodeError:
                 # Если декодирование не удалось, показать как есть (редкий случай для ASCII)
                 ascii_representation = repr(request)
-            print(f"{port_name} 📥 ASCII: {ascii_representation}")
+            log = (
+                f"\n{port_name} 📥 Получены данные HEX: {request.hex(' ').upper()}\n"
+                f"{port_name} 📥 ASCII: {ascii_representation}\n"
+            )
             response = process_request(request)
             if response:
                 ser.write(response)
-                print(f"📤 Отправлен автоответ: {' '.join(f'{b:02X}' for b in response)}")
+                log += f"📤 Отправлен автоответ: {response.hex(' ').upper()}\n"
+            # Весь лог кадра — одной строкой через поток-принтер: рабочий
+            # поток не ждет stdout и сразу берет следующий кадр.
+            console_print_async(log)
             # Не печатаем меню-приглашение из фонового потока:
             # это ломает UX в режимах отправки (HEX/TEXT), создавая ложное
             # впечатление, что приложение вышло в главное меню.
+        except serial.SerialException as serial_err:
+            print(f"\n⚠️ Ошибка порта при отправке автоответа: {serial_err}")
+            if worker_failed is not None:
+                worker_failed.set()
+            if events_q is not None:
+                events_q.put(("error", str(serial_err)))
+            break
+        except Exception as e:
+            print(f"\n⚠️ Ошибка при обработке кадра: {e}")
+
+
+def read_exactly(ser, n: int, timeout: float) -> bytes:
+    """Читает ровно n байт (или меньше, если истек общий дедлайн).
+
+    В отличие от одиночного ser.read(n), короткое чтение возможно только
+    по дедлайну целиком, а не по первому же межбайтовому таймауту —
+    кадры известной длины добираются без ложных разрезов.
+    """
+    deadline = time.monotonic() + timeout
+    buf = bytearray()
+    while len(buf) < n and time.monotonic() < deadline:
+        chunk = ser.read(n - len(buf))
+        if chunk:
+            buf += chunk
+    return bytes(buf)
+
+
+def receive_data(ser, port_name, processing_event, events_q=None):
+    """Функция для приема и обработки данных в отдельном потоке"""
+    # Короткий таймаут блокирующего чтения: ОС будит поток сразу по приходу
+    # байта, а по таймауту мы лишь перепроверяем is_open/паузу. Никаких
+    # sleep-опросов in_waiting — и простой CPU около нуля, и задержка
+    # приема ограничена планировщиком, а не тиком опроса.
+    ser.timeout = 0.1
+    # Читатель только собирает кадры и кладет их в очередь; ответы и
+    # печать делает отдельный рабочий поток. Очередь ограничена: если
+    # вывод не успевает, блокирующий put притормаживает читателя
+    # (обратное давление), а не копит кадры без предела.
+    rx_q = queue.Queue(maxsize=64)
+    # Флаг смерти рабочего потока: читатель перестает класть кадры,
+    # как только отвечать и журналировать больше некому.
+    worker_failed = threading.Event()
+    worker = threading.Thread(
+        target=_handle_frames,
+        args=(rx_q, ser, port_name, events_q, worker_failed),
+        daemon=True,
+    )
+    worker.start()
+    try:
+        _receive_loop(ser, processing_event, rx_q, events_q, worker_failed)
+    finally:
+        # Если рабочий поток умер с полной очередью, блокирующий put
+        # сентинела завис бы навсегда — ждем ограниченно.
+        try:
+            rx_q.put(None, timeout=1.0)
+        except queue.Full:
+            pass
+
+
+def _receive_loop(ser, processing_event, rx_q, events_q=None, worker_failed=None):
+    """Цикл чтения: собирает кадры из порта и передает их в очередь."""
+    # Горячие вызовы цикла — в локальные имена: убирает цепочку LOAD_ATTR
+    # на каждой итерации. Свойства (is_open, in_waiting) так не закэшировать,
+    # они остаются обращениями к атрибуту.
+    is_set = processing_event.is_set
+    wait = processing_event.wait
+    read = ser.read
+    readinto = ser.readinto
+    sleep = time.sleep
+
+    def put(frame: bytes) -> bool:
+        """Кладет кадр в очередь; False — рабочий поток мертв, пора выходить.
+
+        put с таймаутом вместо вечной блокировки: если рабочий поток умер
+        при полной очереди, читатель не зависнет на put навсегда.
+        """
+        while True:
+            if worker_failed is not None and worker_failed.is_set():
+                return False
+            try:
+                rx_q.put(frame, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+    # Добор кадра идет через readinto в один переиспользуемый буфер:
+    # ser.read(n) выделял бы свежий bytes на каждое пробуждение, что на
+    # плотном трафике нагружает аллокатор. Запрашивается не больше, чем
+    # уже лежит в драйвере, поэтому readinto не блокируется.
+    rx_buf = bytearray(4096)
+    rx_mv = memoryview(rx_buf)
+    while ser.is_open:
+        try:
+            # Если прием на паузе, спим до разрешения без таймера: wait()
+            # без аргумента будит поток ровно в момент set(). Данные тем
+            # временем копятся в буфере драйвера. Все пути завершения в
+            # main() ставят событие, так что поток не зависнет на выходе.
+            if not is_set():
+                wait()
+                continue
+
+            first = read(1)
+            if not first:
+                continue
+
+            # Первый байт получен — добираем кадр целиком. На низких
+            # скоростях остальные байты еще в пути, поэтому ждем паузу
+            # длиной inter_byte_timeout: пока байты продолжают приходить,
+            # кадр не считается завершенным (иначе запрос режется на
+            # фрагменты и ломает точное сопоставление в process_request).
+            frame = bytearray(first)
+            frame_gap = ser.inter_byte_timeout or 0.01
+            # Кадры с заголовком 0x01 имеют известную длину (3 байта:
+            # и статические запросы, и параметрические) — добираем хвост
+            # точным чтением с дедлайном, а не по межбайтовой паузе.
+            # Если кадр оказался длиннее, ниже доберем его по паузе.
+            if first == b"\x01":
+                frame += read_exactly(ser, 2, frame_gap * 2)
+                if len(frame) == 3:
+                    # in_waiting == 0 сразу после добора еще не значит
+                    # «кадр закончился»: следующий байт длинного кадра
+                    # может быть в пути (~0.3 мс на 38400). Нулю верим
+                    # только после паузы в межбайтовый таймаут.
+                    sleep(frame_gap)
+                    if not ser.in_waiting:
+                        if not put(bytes(frame)):
+                            break
+                        continue
+            pending = ser.in_waiting
+            if pending:
+                n = readinto(rx_mv[:min(len(rx_buf), pending)])
+                frame += rx_mv[:n]
+            while True:
+                sleep(frame_gap)
+                pending = ser.in_waiting
+                if not pending:
+                    break
+                n = readinto(rx_mv[:min(len(rx_buf), pending)])
+                frame += rx_mv[:n]
+            if not put(bytes(frame)):
+                break
 
         except serial.SerialException as serial_err:
             # Обработка ошибок, связанных с портом (например, отключение устройства)
             print(f"\n⚠️ Ошибка порта в потоке приема: {serial_err}")
+            # Сообщаем главному циклу о смерти приемника через очередь
+            # событий: UI узнает об этом на своем ближайшем ожидании, а не
+            # через периодическую проверку is_alive().
+            if events_q is not None:
+                events_q.put(("error", str(serial_err)))
             break # Выход из цикла потока
         except OSError as e:
             # При закрытии порта в другом потоке на Unix/macOS возможен EBADF.
@@ -375,17 +913,46 @@ def receive_data(ser, port_name, processing_event):
             # Можно продолжить или выйти в зависимости от типа ошибки
             time.sleep(0.1)
 
+# Команды часто переотправляются из истории без изменений — разбор строки
+# и расчет CRC кэшируются по самой строке, повторная отправка обходится
+# одним поиском в LRU.
+@functools.lru_cache(maxsize=256)
+def _parse_hex(hex_string: str) -> bytes:
+    """Разбирает HEX-строку в байты (пробелы между байтами допустимы)."""
+    return bytes.fromhex(hex_string)
+
+
+# Зеркало правил bytes.fromhex: пары HEX-цифр, пробельные символы только
+# между парами. Один C-уровневый проход движка re дешевле возбуждения
+# ValueError на каждой опечатке (исключения lru_cache не кэширует).
+_HEX_RE = re.compile(r"\s*(?:[0-9a-fA-F]{2}\s*)+\Z")
+
+
+def _is_valid_hex(hex_string: str) -> bool:
+    """Быстрая проверка формата HEX-строки до разбора."""
+    return _HEX_RE.match(hex_string) is not None
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_hex_with_crc(hex_string: str) -> tuple[bytes, bytes]:
+    """Возвращает (данные, CRC-хвост little-endian) для HEX-строки."""
+    data = _parse_hex(hex_string)
+    return data, calculate_crc16(data).to_bytes(2, 'little')
+
+
 def send_hex_data(ser, hex_string: str):
     """Отправка HEX данных в порт"""
+    # Опечатка в длинной вставленной строке отсеивается дешевой проверкой,
+    # а не возбуждением ValueError из разбора.
+    if not _is_valid_hex(hex_string):
+        print("❌ Ошибка: неверный формат HEX данных")
+        return False
     try:
-        hex_string = hex_string.replace(" ", "")
-        if not all(c in '0123456789ABCDEFabcdef' for c in hex_string):
-            print("❌ Ошибка: неверный формат HEX данных")
-            return False
-        
-        data = bytes.fromhex(hex_string)
+        # bytes.fromhex сам пропускает пробелы между байтами и валидирует
+        # строку (ValueError ниже — лишь подстраховка после проверки).
+        data = _parse_hex(hex_string)
         ser.write(data)
-        print(f"📤 Отправлено (HEX): {' '.join(f'{b:02X}' for b in data)}")
+        console_write(f"📤 Отправлено (HEX): {data.hex(' ').upper()}\n")
         return True
     except ValueError:
         print("❌ Ошибка: неверный формат HEX данных")
@@ -393,20 +960,20 @@ def send_hex_data(ser, hex_string: str):
 
 def send_hex_data_with_crc(ser, hex_string: str):
     """Отправка HEX данных в порт с добавлением CRC16"""
+    if not _is_valid_hex(hex_string):
+        print("❌ Ошибка: неверный формат HEX данных")
+        return False
     try:
-        hex_string = hex_string.replace(" ", "")
-        if not all(c in '0123456789ABCDEFabcdef' for c in hex_string):
-            print("❌ Ошибка: неверный формат HEX данных")
-            return False
-        
-        data = bytes.fromhex(hex_string)
-        crc = calculate_crc16(data)
-        
-        # Добавляем CRC к данным (младший байт первый)
-        final_data = data + bytes([crc & 0xFF, (crc >> 8) & 0xFF])
-        
-        ser.write(final_data)
-        print(f"📤 Отправлено (HEX+CRC): {' '.join(f'{b:02X}' for b in data)} | CRC: {crc & 0xFF:02X} {(crc >> 8) & 0xFF:02X}")
+        # Пробелы и валидация — на стороне bytes.fromhex (ValueError ниже);
+        # CRC-хвост (младший байт первый) приходит из того же кэша и
+        # используется и для отправки, и для лога.
+        data, crc_tail = _parse_hex_with_crc(hex_string)
+
+        ser.write(data + crc_tail)
+        console_write(
+            f"📤 Отправлено (HEX+CRC): {data.hex(' ').upper()} "
+            f"| CRC: {crc_tail.hex(' ').upper()}\n"
+        )
         return True
         
     except ValueError:
@@ -417,9 +984,15 @@ def send_text_message(ser, message: str):
     """Отправка текстового сообщения в порт"""
     data = message.encode('utf-8')
     ser.write(data)
-    print(f"📤 Отправлено (текст): {message}")
+    console_write(f"📤 Отправлено (текст): {message}\n")
     return True
 
+# Пара фиксированных статусов приема — модульные константы: меню
+# перерисовывается после каждого действия, собирать строки заново незачем.
+_STATUS_ACTIVE = "▶️ Прием команд активен."
+_STATUS_PAUSED = "⏸ Прием команд остановлен."
+
+
 def show_menu(status_message: str | None = None):
     """Отображение меню команд и опционального статусного сообщения."""
     print("\n=== 📋 Меню команд ===")
@@ -432,12 +1005,78 @@ def show_menu(status_message: str | None = None):
     print("7. Выход")
     print("8. 🕘 История команд")
     if status_message:
-        print(f"\n{status_message}") 
+        print(f"\n{status_message}")
     print("Выберите действие (1-8), Меню (Esc) или Выход (Ctrl+C): ", end='', flush=True)
 
+
+def update_status(message: str):
+    """Перерисовывает только строку статуса под меню.
+
+    Статус стоит ровно одной строкой выше промпта, так что хватает
+    относительного перемещения курсора: подняться, стереть строку,
+    вписать новый статус и вернуться к промпту. Полная перерисовка
+    меню остается для консолей без VT-обработки.
+    """
+    if _ANSI_SUPPORTED:
+        console_write(f"\x1b[s\x1b[1A\r\x1b[2K{message}\x1b[u")
+    else:
+        show_menu(status_message=message)
+
+
+def _read_menu_key_windows() -> tuple[bytes | None, bool]:
+    """Ждет клавишу меню из очереди насоса; (None, False) по таймауту."""
+    return get_key(timeout=1.0), False
+
+
+def _read_menu_key_posix() -> tuple[bytes | None, bool]:
+    """Читает клавишу меню; второй элемент — «съедена ANSI-последовательность»."""
+    key = getch()
+    # ANSI-стрелки начинаются с ESC-последовательности.
+    # Не воспринимаем их как "Esc в меню".
+    if key == b'\x1b':
+        time.sleep(0.01)
+        consumed_escape_sequence = False
+        while kbhit():
+            getch()
+            consumed_escape_sequence = True
+        if consumed_escape_sequence:
+            return key, True
+    return key, False
+
+
+# Платформенный обработчик выбирается один раз при импорте, а не проверкой
+# os.name на каждое нажатие в цикле меню.
+_menu_read_key = _read_menu_key_windows if os.name == 'nt' else _read_menu_key_posix
+
+# Номер порта из имени устройства (COM10 -> 10): один C-уровневый поиск
+# вместо питоновского фильтра по символам на каждый порт при сортировке.
+_COM_NUMBER_RE = re.compile(r"\d+")
+
+
+# Перечисление портов (реестр на Windows, обход /sys на Linux) — дорогой
+# вызов, а интерактивные циклы дергают его по несколько раз подряд.
+# Короткий TTL-кэш убирает повторные обращения, оставаясь «свежим»
+# для пользователя; после запуска дубликата кэш сбрасывается явно.
+_PORTS_CACHE_TTL = 1.0
+_ports_cache: tuple[float, list] | None = None
+
+
+def _cached_comports() -> list:
+    global _ports_cache
+    now = time.monotonic()
+    if _ports_cache is None or now - _ports_cache[0] > _PORTS_CACHE_TTL:
+        _ports_cache = (now, list(serial.tools.list_ports.comports()))
+    return _ports_cache[1]
+
+
+def invalidate_ports_cache():
+    global _ports_cache
+    _ports_cache = None
+
+
 def list_available_ports():
     """Возвращает список доступных COM-портов и выводит их на экран, отсортированных по номеру."""
-    ports = list(serial.tools.list_ports.comports())
+    ports = list(_cached_comports())
     if not ports:
         print("❌ Нет доступных последовательных портов!")
         return []
@@ -456,9 +1095,8 @@ def list_available_ports():
     # Функция для извлечения номера из имени порта (например, COM10 -> 10)
     def extract_com_number(port_info):
         try:
-            # Ищем только цифры в имени устройства
-            num_str = ''.join(filter(str.isdigit, port_info.device))
-            return int(num_str) if num_str else float('inf') # Если цифр нет, ставим в конец
+            match = _COM_NUMBER_RE.search(port_info.device)
+            return int(match.group()) if match else float('inf') # Если цифр нет, ставим в конец
         except (ValueError, TypeError):
             return float('inf') # В случае ошибки ставим в конец
 
@@ -480,7 +1118,7 @@ def select_port():
 
     while True:
         try:
-            selected_raw = input("\nВведите номер порта (или 0 для дубликата): ").strip()
+            selected_raw = console_input("\nВведите номер порта (или 0 для дубликата): ").strip()
             if selected_raw == "0":
                 launch_duplicate_instance()
                 continue
@@ -520,29 +1158,58 @@ def launch_duplicate_instance():
             subprocess.Popen([sys.executable, str(Path(__file__).resolve())])
 
         print("✅ Запущен новый экземпляр приложения.")
+        # Новый экземпляр может занять/создать порт — следующий список
+        # должен быть свежим.
+        invalidate_ports_cache()
     except Exception as e:
         print(f"❌ Не удалось запустить дубликат: {e}")
 
+# Множество имен портов переживает тот же TTL, что и список устройств:
+# доктор и перерисовки меню проверяют доступность по несколько раз подряд,
+# и пересобирать set на каждую проверку незачем. Привязка по идентичности
+# списка — обновился список, обновится и множество.
+_ports_set_cache: tuple[list, set[str]] | None = None
+
+
 def is_port_currently_available(port_name: str) -> bool:
     """Проверяет, что порт все еще присутствует в актуальном списке устройств."""
-    current_ports = {p.device.upper() for p in serial.tools.list_ports.comports()}
-    return port_name.upper() in current_ports
+    global _ports_set_cache
+    ports = _cached_comports()
+    if _ports_set_cache is None or _ports_set_cache[0] is not ports:
+        _ports_set_cache = (ports, {p.device.upper() for p in ports})
+    return port_name.upper() in _ports_set_cache[1]
 
 def ask_retry_port_selection() -> bool:
     """Спрашивает, нужно ли повторить выбор порта."""
     while True:
-        retry = input("\nПопробовать выбрать другой порт? (y/n): ").lower().strip()
+        retry = console_input("\nПопробовать выбрать другой порт? (y/n): ").lower().strip()
         if retry in ['y', 'n']:
+            if retry == 'y':
+                # Пользователь мог переподключить устройство — список
+                # портов перечитывается заново.
+                invalidate_ports_cache()
             return retry == 'y'
         print("Пожалуйста, введите 'y' или 'n'")
 
+# Приметы фантомного порта собраны в один скомпилированный re: один
+# линейный проход по тексту ошибки вместо трех независимых поисков in.
+_PHANTOM_RE = re.compile(
+    "|".join(
+        map(
+            re.escape,
+            (
+                "A device which does not exist was specified",
+                "WinError 433",
+                "OSError(22",
+            ),
+        )
+    )
+)
+
+
 def is_phantom_port_error(error_text: str) -> bool:
     """Определяет типовую ошибку Windows для отключенного/фантомного COM-порта."""
-    return (
-        "A device which does not exist was specified" in error_text
-        or "WinError 433" in error_text
-        or "OSError(22" in error_text
-    )
+    return _PHANTOM_RE.search(error_text) is not None
 
 def choose_configuration_mode():
     """Выбор режима настройки порта"""
@@ -559,7 +1226,10 @@ def choose_configuration_mode():
             return None
         if key == b'2':
             print("2")
-            return DEFAULT_SETTINGS
+            # Копия, а не сам DEFAULT_SETTINGS: compute_frame_timing кэширует
+            # тайминги прямо в словаре сессии, и приватные ключи не должны
+            # протекать в общий модульный объект.
+            return dict(DEFAULT_SETTINGS)
         if key == b'\x03':
             raise KeyboardInterrupt
         print("⚠️ Некорректный выбор. Пожалуйста, введите 1 или 2.")
@@ -639,6 +1309,38 @@ def full_port_configuration():
         "stopbits": stopbits
     }
 
+
+def compute_frame_timing(settings) -> tuple[int, float | None]:
+    """Считает (bits_per_char, inter_byte_timeout) и кэширует их в settings.
+
+    Значения зависят только от параметров порта, поэтому выводятся один
+    раз на сессию и складываются в settings["_bits_per_char"]/["_ibt"] —
+    любой код таймингов (приемник, кадрирование) берет их оттуда.
+    """
+    if "_bits_per_char" in settings:
+        return settings["_bits_per_char"], settings["_ibt"]
+
+    # Старт-бит + биты данных + стоп-биты (+ бит паритета, если есть)
+    bits_per_char = 1 + settings["bytesize"] + settings["stopbits"]
+    if settings["parity"] != serial.PARITY_NONE:
+        bits_per_char += 1
+
+    if settings["baudrate"] > 0:
+        # Время передачи 20 символов плюс небольшой запас (10% или 5 мс)
+        inter_byte_timeout = (bits_per_char * 20) / settings["baudrate"]
+        inter_byte_timeout += max(0.005, inter_byte_timeout * 0.1)
+        # Ограничение сверху, чтобы не ждать слишком долго на низких скоростях
+        if inter_byte_timeout > 0.5:
+            inter_byte_timeout = 0.5
+    else:
+        # Если скорость 0, таймаут не имеет смысла
+        inter_byte_timeout = None
+
+    settings["_bits_per_char"] = bits_per_char
+    settings["_ibt"] = inter_byte_timeout
+    return bits_per_char, inter_byte_timeout
+
+
 def read_line_msvcrt(prompt="", history_key: str | None = None):
     """Читает строку ввода посимвольно (кроссплатформенно).
     
@@ -649,21 +1351,16 @@ def read_line_msvcrt(prompt="", history_key: str | None = None):
     # посимвольный raw-ввод может вести себя нестабильно.
     # Для надежности используем обычный построчный input().
     if os.name != 'nt':
+        # Делимитеры и бинд Tab заданы один раз в _init_readline();
+        # на промпт меняется только содержимое: история, completer и хук.
         old_completer = None
-        old_delims = None
-        display_hook_supported = hasattr(readline, "set_completion_display_matches_hook")
+        display_hook_supported = READLINE_AVAILABLE and hasattr(
+            readline, "set_completion_display_matches_hook"
+        )
         if READLINE_AVAILABLE:
             if history_key in HISTORY_KEYS:
                 apply_readline_history(history_key)
             old_completer = readline.get_completer()
-            old_delims = readline.get_completer_delims()
-            readline.set_completer_delims(" \t\n")
-            # На macOS часто используется libedit (не GNU readline).
-            # Для него нужен другой синтаксис бинда Tab.
-            if "libedit" in (getattr(readline, "__doc__", "") or "").lower():
-                readline.parse_and_bind("bind ^I rl_complete")
-            else:
-                readline.parse_and_bind("tab: complete")
             readline.set_completer(make_readline_completer(history_key))
             if display_hook_supported:
                 readline.set_completion_display_matches_hook(make_readline_display_hook(prompt))
@@ -672,8 +1369,6 @@ def read_line_msvcrt(prompt="", history_key: str | None = None):
         finally:
             if READLINE_AVAILABLE:
                 readline.set_completer(old_completer)
-                if old_delims is not None:
-                    readline.set_completer_delims(old_delims)
                 if display_hook_supported:
                     readline.set_completion_display_matches_hook(None)
         # Аналог "Esc" для line-input режима.
@@ -682,9 +1377,24 @@ def read_line_msvcrt(prompt="", history_key: str | None = None):
         return user_input
         
     print(prompt, end='', flush=True)
-    chars = []
+    # Ввод копится байтами (cp866 — однобайтовая кодировка, так что длина
+    # буфера равна числу символов на экране); строка декодируется один раз
+    # по Enter, а не по одному байту на каждое нажатие.
+    buf = bytearray()
     history_index = -1  # -1 = новая команда, 0+ = индекс в истории
-    current_history = COMMAND_HISTORY.get(history_key, []) if history_key in HISTORY_KEYS else []
+    # Для навигации стрелками нужен индексируемый снимок истории.
+    current_history = list(_get_history().get(history_key, ())) if history_key in HISTORY_KEYS else []
+    # Кандидаты Tab-автодополнения берутся из общего бора (того же, что
+    # использует readline-completer на Unix); история внутри промпта не
+    # меняется, поэтому бор достаточно взять один раз.
+    tab_trie = get_completion_trie(history_key)
+
+    def _replace_line(text: str):
+        """Заменяет текущий ввод на text (история/автодополнение)."""
+        nonlocal buf
+        print('\r' + ' ' * (len(prompt) + len(buf)), end='', flush=True)
+        buf = bytearray(text.encode('cp866', errors='replace'))
+        print(f'\r{prompt}{text}', end='', flush=True)
 
     while True:
         try:
@@ -697,27 +1407,18 @@ def read_line_msvcrt(prompt="", history_key: str | None = None):
                 print(" [Esc]") # Показываем, что нажали Esc
                 return None # Возвращаем None для выхода из цикла
             elif key == b'\x08' or key == b'\x7f': # Backspace (Windows \x08, Unix \x7f)
-                if chars:
-                    chars.pop()
+                if buf:
+                    buf.pop()
                     # Стереть символ с консоли: \b (назад) + ' ' (пробел) + \b (назад)
                     print('\b \b', end='', flush=True)
                     history_index = -1  # Сброс при ручном редактировании
             elif key == b'\t':  # Tab - автодополнение
-                current_text = "".join(chars).lower()
-                # Кандидаты: служебные команды + история текущего режима
-                candidates = list(RUNTIME_COMMANDS)
-                if history_key in HISTORY_KEYS:
-                    candidates.extend(COMMAND_HISTORY.get(history_key, []))
-                # Удаляем дубликаты и сортируем
-                candidates = sorted(set(candidates), key=str.lower)
-                # Ищем совпадения
-                matches = [c for c in candidates if c.lower().startswith(current_text)]
+                current_text = buf.decode('cp866', errors='replace')
+                matches = sorted(_trie_prefix_matches(tab_trie, current_text), key=str.lower)
 
                 if len(matches) == 1:
                     # Одно совпадение - автодополняем
-                    print('\r' + ' ' * (len(prompt) + len(chars)), end='', flush=True)
-                    chars = list(matches[0])
-                    print(f'\r{prompt}{"".join(chars)}', end='', flush=True)
+                    _replace_line(matches[0])
                     history_index = -1
                 elif len(matches) > 1:
                     # Несколько совпадений - показываем список
@@ -729,46 +1430,41 @@ def read_line_msvcrt(prompt="", history_key: str | None = None):
                             print(f"  {match:<12} - {hint}")
                         else:
                             print(f"  {match}")
-                    print(f'{prompt}{"".join(chars)}', end='', flush=True)
+                    print(f'{prompt}{buf.decode("cp866", errors="replace")}', end='', flush=True)
             elif key == b'\x03': # Ctrl+C
                  # Не прерываем здесь, чтобы позволить основному циклу обработать
                  print(" [Ctrl+C]")
                  raise KeyboardInterrupt
             elif key == b'\x00' or key == b'\xe0':  # Специальные клавиши на Windows (стрелки, F-клавиши и т.д.)
-                if kbhit():  # Проверяем наличие второго байта
-                    arrow_key = getch()
-                    if arrow_key == b'H' and current_history:  # Стрелка вверх
-                        # Перемещаемся назад по истории
-                        if history_index == -1:
-                            history_index = len(current_history) - 1
-                        elif history_index > 0:
-                            history_index -= 1
-
-                        # Очищаем текущую строку и выводим команду из истории
-                        print('\r' + ' ' * (len(prompt) + len(chars)), end='', flush=True)
-                        chars = list(current_history[history_index])
-                        print(f'\r{prompt}{"".join(chars)}', end='', flush=True)
-
-                    elif arrow_key == b'P' and current_history:  # Стрелка вниз
-                        # Перемещаемся вперед по истории
-                        if history_index >= 0 and history_index < len(current_history) - 1:
-                            history_index += 1
-                            # Очищаем строку и выводим следующую команду
-                            print('\r' + ' ' * (len(prompt) + len(chars)), end='', flush=True)
-                            chars = list(current_history[history_index])
-                            print(f'\r{prompt}{"".join(chars)}', end='', flush=True)
-                        elif history_index >= 0:
-                            # Возвращаемся к пустому вводу
-                            history_index = -1
-                            print('\r' + ' ' * (len(prompt) + len(chars)), end='', flush=True)
-                            chars = []
-                            print(f'\r{prompt}', end='', flush=True)
+                # Второй байт расширенной клавиши гарантирован — читаем
+                # блокирующе, не полагаясь на гонку с потоком-насосом.
+                arrow_key = getch()
+                if arrow_key == b'H' and current_history:  # Стрелка вверх
+                    # Перемещаемся назад по истории
+                    if history_index == -1:
+                        history_index = len(current_history) - 1
+                    elif history_index > 0:
+                        history_index -= 1
+
+                    # Очищаем текущую строку и выводим команду из истории
+                    _replace_line(current_history[history_index])
+
+                elif arrow_key == b'P' and current_history:  # Стрелка вниз
+                    # Перемещаемся вперед по истории
+                    if history_index >= 0 and history_index < len(current_history) - 1:
+                        history_index += 1
+                        # Очищаем строку и выводим следующую команду
+                        _replace_line(current_history[history_index])
+                    elif history_index >= 0:
+                        # Возвращаемся к пустому вводу
+                        history_index = -1
+                        _replace_line("")
             else:
                 try:
                     char = key.decode('cp866') # Попробуем OEM кодировку Windows
                     # char = key.decode('utf-8') # Или utf-8, если cp866 не подходит
                     if char.isprintable(): # Печатаем только видимые символы
-                         chars.append(char)
+                         buf += key
                          print(char, end='', flush=True)
                          history_index = -1  # Сброс индекса при ручном вводе
                 except UnicodeDecodeError:
@@ -780,7 +1476,20 @@ def read_line_msvcrt(prompt="", history_key: str | None = None):
             # Лучше передать выше
             raise KeyboardInterrupt
 
-    return "".join(chars)
+    return buf.decode('cp866', errors='replace')
+
+
+def console_input(prompt: str = "") -> str:
+    """Замена input() для обычных (построчных) промптов.
+
+    На Windows клавиши забирает поток-насос, поэтому cooked-режим input()
+    конкурировал бы с ним за консоль — строку читаем из той же очереди
+    через read_line_msvcrt. На Unix это обычный input().
+    """
+    if os.name != 'nt':
+        return input(prompt)
+    line = read_line_msvcrt(prompt)
+    return "" if line is None else line
 
 
 def ensure_receive_active(processing_event):
@@ -789,61 +1498,122 @@ def ensure_receive_active(processing_event):
         processing_event.set()
         print("ℹ️ Прием данных был остановлен и автоматически возобновлен.")
 
-def handle_send_text_loop(ser, settings, receiver_thread, processing_event):
-    """Цикл для непрерывной отправки текстовых сообщений."""
+# Режимы отправки отличаются только заголовком, промптом и функцией
+# отправки — сам цикл один на всех: правка логики (очереди, пакетная
+# отправка) сразу касается всех трех режимов.
+_SEND_MODES = {
+    "text": ("текста", "Введите текст: ", send_text_message),
+    "hex": ("HEX", "Введите HEX: ", send_hex_data),
+    "hex_crc": ("HEX+CRC", "Введите HEX для CRC: ", send_hex_data_with_crc),
+}
+
+
+def _run_send_loop(ser, settings, receiver_thread, processing_event, history_key):
+    """Общий цикл непрерывной отправки; режим задается ключом истории."""
+    mode_label, prompt, sender = _SEND_MODES[history_key]
     print() # Добавляем пустую строку
     ensure_receive_active(processing_event)
-    print("\n--- Режим отправки текста (Esc для возврата в меню; help/init/doctor/history) ---")
+    print(f"\n--- Режим отправки {mode_label} (Esc для возврата в меню; help/init/doctor/history) ---")
     while True:
-        message = read_line_msvcrt(prompt="Введите текст: ", history_key="text")
+        message = read_line_msvcrt(prompt=prompt, history_key=history_key)
         if message is None: # Нажат Esc в read_line_msvcrt
             break
         if message and ser.is_open: # Отправляем только если не пустая строка
-            if handle_runtime_command(message, ser, settings, receiver_thread, processing_event, "text"):
+            if handle_runtime_command(message, ser, settings, receiver_thread, processing_event, history_key):
                 continue
-            if send_text_message(ser, message):
-                add_command_to_history("text", message)
+            if sender(ser, message):
+                add_command_to_history(history_key, message)
+    # Возврат в меню — естественная граница пакета: все накопленные
+    # команды уходят на диск одной записью, не дожидаясь таймера.
+    flush_history()
+
+
+def handle_send_text_loop(ser, settings, receiver_thread, processing_event):
+    """Цикл для непрерывной отправки текстовых сообщений."""
+    _run_send_loop(ser, settings, receiver_thread, processing_event, "text")
+
+# Справка статична — готовый блок вместо восьми отдельных print:
+# один захват блокировки вывода и один write против восьми.
+_RUNTIME_COMMANDS_HELP_TEXT = (
+    "\n=== 🆘 Служебные команды ===\n"
+    "  help   - Показать эту справку\n"
+    "  init   - Показать текущие параметры порта/сессии\n"
+    "  doctor - Диагностика состояния соединения и потока приема\n"
+    "  history- Показать историю команд текущего режима\n"
+    "  esc    - Возврат в меню (также /esc, /menu, /back)\n"
+    "  Tab    - Автодополнение команд\n"
+)
+
 
 def print_runtime_commands_help():
     """Показывает служебные команды, доступные в режимах отправки."""
-    print("\n=== 🆘 Служебные команды ===")
-    print("  help   - Показать эту справку")
-    print("  init   - Показать текущие параметры порта/сессии")
-    print("  doctor - Диагностика состояния соединения и потока приема")
-    print("  history- Показать историю команд текущего режима")
-    print("  esc    - Возврат в меню (также /esc, /menu, /back)")
-    print("  Tab    - Автодополнение команд")
+    console_write(_RUNTIME_COMMANDS_HELP_TEXT)
 
 
 def print_init_info(ser, settings):
     """Показывает краткую сводку текущей инициализации порта."""
-    print("\n=== ⚙️ Init / Текущая сессия ===")
-    print(f"Порт: {ser.port}")
-    print(f"Скорость: {settings['baudrate']} бод")
-    print(f"Биты данных: {settings['bytesize']}")
-    print(f"Паритет: {settings['parity']}")
-    print(f"Стоп-биты: {settings['stopbits']}")
-    print(f"timeout: {ser.timeout}")
-    print(f"inter_byte_timeout: {ser.inter_byte_timeout}")
-    print(f"Файл истории: {HISTORY_FILE}")
+    console_write(
+        "\n=== ⚙️ Init / Текущая сессия ===\n"
+        f"Порт: {ser.port}\n"
+        f"Скорость: {settings['baudrate']} бод\n"
+        f"Биты данных: {settings['bytesize']}\n"
+        f"Паритет: {settings['parity']}\n"
+        f"Стоп-биты: {settings['stopbits']}\n"
+        f"timeout: {ser.timeout}\n"
+        f"inter_byte_timeout: {ser.inter_byte_timeout}\n"
+        f"Файл истории: {HISTORY_FILE}\n"
+    )
 
 
 def run_doctor(ser, receiver_thread, processing_event):
     """Диагностика текущего состояния соединения."""
-    print("\n=== 🩺 Doctor ===")
-    print(f"Порт открыт: {'да' if ser.is_open else 'нет'}")
-    print(f"Порт доступен в системе: {'да' if is_port_currently_available(ser.port) else 'нет'}")
-    print(f"Поток приема жив: {'да' if receiver_thread and receiver_thread.is_alive() else 'нет'}")
-    print(f"Прием разрешен: {'да' if processing_event.is_set() else 'нет'}")
+    # Сначала собираем значения (с их обработкой ошибок), затем выводим
+    # весь отчет одним блоком.
     try:
-        print(f"in_waiting: {ser.in_waiting}")
+        in_waiting = str(ser.in_waiting)
     except Exception as e:
-        print(f"in_waiting: ошибка ({e})")
+        in_waiting = f"ошибка ({e})"
     try:
-        print(f"out_waiting: {ser.out_waiting}")
+        out_waiting = str(ser.out_waiting)
     except Exception as e:
-        print(f"out_waiting: ошибка ({e})")
-    print("Doctor: OK")
+        out_waiting = f"ошибка ({e})"
+    console_write(
+        "\n=== 🩺 Doctor ===\n"
+        f"Порт открыт: {'да' if ser.is_open else 'нет'}\n"
+        f"Порт доступен в системе: {'да' if is_port_currently_available(ser.port) else 'нет'}\n"
+        f"Поток приема жив: {'да' if receiver_thread and receiver_thread.is_alive() else 'нет'}\n"
+        f"Прием разрешен: {'да' if processing_event.is_set() else 'нет'}\n"
+        f"in_waiting: {in_waiting}\n"
+        f"out_waiting: {out_waiting}\n"
+        "Doctor: OK\n"
+    )
+
+
+# Диспетчеризация служебных команд одной dict-выборкой вместо цепочки
+# if/elif: каждая запись принимает полный контекст режима отправки и сама
+# выбирает нужные аргументы.
+_CMD_DISPATCH = {
+    "help": lambda ser, settings, receiver_thread, processing_event, history_key:
+        print_runtime_commands_help(),
+    "init": lambda ser, settings, receiver_thread, processing_event, history_key:
+        print_init_info(ser, settings),
+    "doctor": lambda ser, settings, receiver_thread, processing_event, history_key:
+        run_doctor(ser, receiver_thread, processing_event),
+    "history": lambda ser, settings, receiver_thread, processing_event, history_key:
+        show_history_entries(history_key),
+}
+
+# Слэш-алиасы — модульный синглтон: handle_runtime_command вызывается на
+# каждый Enter в режимах отправки, пересоздавать dict на каждый вызов незачем.
+_CMD_ALIASES = {
+    "/help": "help",
+    "/init": "init",
+    "/doctor": "doctor",
+    "/history": "history",
+}
+
+# Верхняя граница длины команды для быстрого отсева payload'ов.
+_MAX_CMD_LEN = max(map(len, RUNTIME_COMMANDS))
 
 
 def handle_runtime_command(
@@ -857,78 +1627,53 @@ def handle_runtime_command(
     """Обрабатывает служебные команды в режимах отправки.
     Возвращает True, если команда обработана и отправка не нужна.
     """
-    command = raw_value.strip().lower()
-    aliases = {
-        "/help": "help",
-        "/init": "init",
-        "/doctor": "doctor",
-        "/history": "history",
-    }
-    command = aliases.get(command, command)
+    command = raw_value.strip()
+    # Быстрый отсев: типичный ввод в HEX-режимах — payload с цифрами и
+    # пробелами, ему незачем проходить lower, алиасы и бор. Команды
+    # короткие и состоят только из букв (плюс необязательный слэш).
+    if len(command) > _MAX_CMD_LEN + 1 or not command.lstrip("/").isalpha():
+        return False
+    command = command.lower()
+    command = _CMD_ALIASES.get(command, command)
 
     # Надежный fallback: автодополнение по уникальному префиксу на Enter.
-    # Пример: "do" -> "doctor", "his" -> "history".
-    known_commands = ("help", "init", "doctor", "history")
-    if command not in known_commands:
-        prefix_matches = [cmd for cmd in known_commands if cmd.startswith(command)]
+    # Пример: "do" -> "doctor", "his" -> "history". Поиск — по бору команд.
+    if command not in _CMD_DISPATCH:
+        prefix_matches = _trie_prefix_matches(_CMD_TRIE, command)
         if len(prefix_matches) == 1:
             command = prefix_matches[0]
 
-    if command == "help":
-        print_runtime_commands_help()
-        return True
-    if command == "init":
-        print_init_info(ser, settings)
-        return True
-    if command == "doctor":
-        run_doctor(ser, receiver_thread, processing_event)
-        return True
-    if command == "history":
-        show_history_entries(history_key)
+    handler = _CMD_DISPATCH.get(command)
+    if handler is not None:
+        handler(ser, settings, receiver_thread, processing_event, history_key)
         return True
     return False
 
 
 def handle_send_hex_loop(ser, settings, receiver_thread, processing_event):
     """Цикл для непрерывной отправки HEX данных."""
-    print() # Добавляем пустую строку
-    ensure_receive_active(processing_event)
-    print("\n--- Режим отправки HEX (Esc для возврата в меню; help/init/doctor/history) ---")
-    while True:
-        hex_data = read_line_msvcrt(prompt="Введите HEX: ", history_key="hex")
-        if hex_data is None: # Нажат Esc
-            break
-        if hex_data and ser.is_open:
-            if handle_runtime_command(hex_data, ser, settings, receiver_thread, processing_event, "hex"):
-                continue
-            if send_hex_data(ser, hex_data):
-                add_command_to_history("hex", hex_data)
+    _run_send_loop(ser, settings, receiver_thread, processing_event, "hex")
 
 def handle_send_hex_crc_loop(ser, settings, receiver_thread, processing_event):
     """Цикл для непрерывной отправки HEX данных с CRC."""
-    print() # Добавляем пустую строку
-    ensure_receive_active(processing_event)
-    print("\n--- Режим отправки HEX+CRC (Esc для возврата в меню; help/init/doctor/history) ---")
-    while True:
-        hex_data = read_line_msvcrt(prompt="Введите HEX для CRC: ", history_key="hex_crc")
-        if hex_data is None: # Нажат Esc
-            break
-        if hex_data and ser.is_open:
-            if handle_runtime_command(hex_data, ser, settings, receiver_thread, processing_event, "hex_crc"):
-                continue
-            if send_hex_data_with_crc(ser, hex_data):
-                add_command_to_history("hex_crc", hex_data)
+    _run_send_loop(ser, settings, receiver_thread, processing_event, "hex_crc")
+
+# Статические пары запрос→ответ: один хеш-поиск по dict вместо цепочки
+# сравнений с пересозданием bytes([...]) на каждый входящий кадр.
+_STATIC_RESPONSES = {
+    b"\x01\x02\x03": b"\x01\x0c",
+    b"\x41": b"\x20\x00",
+    b"\xaa\xbb\xcc": b"\xdd\xee",
+}
+
 
 def process_request(request):
     """Логика обработки входящих данных и автогенерации ответа."""
-    if request == bytes([0x01, 0x02, 0x03]):
-        return bytes([0x01, 0x0C])
-    elif request == bytes([0x41]):
-        return bytes([0x20, 0x00])
-    elif request == bytes([0xAA, 0xBB, 0xCC]):
-        return bytes([0xDD, 0xEE])
-    elif len(request) == 3 and request[0] == 0x01:
-        return bytes([request[0], request[1] + 10])
+    response = _STATIC_RESPONSES.get(request)
+    if response is not None:
+        return response
+    if len(request) == 3 and request[0] == 0x01:
+        return bytes((request[0], (request[1] + 10) & 0xFF))
 
     return None
 
@@ -960,27 +1705,11 @@ def main():
             if settings is None:
                 settings = full_port_configuration()
 
-            # Расчет inter_byte_timeout для 20 байт
-            bits_per_char = 1 + settings["bytesize"] + settings["stopbits"]
-            # Добавляем 1 бит, если есть паритет (кроме PARITY_NONE)
-            if settings["parity"] != serial.PARITY_NONE:
-                bits_per_char += 1
-            
-            inter_byte_timeout_calc = 0
-            if settings["baudrate"] > 0:
-                 # Время передачи 20 символов
-                inter_byte_timeout_calc = (bits_per_char * 20) / settings["baudrate"] # Возвращаем 20
-                # Добавляем небольшой запас, например, 10% или несколько мс
-                inter_byte_timeout_calc += max(0.005, inter_byte_timeout_calc * 0.1) 
-            else:
-                # Если скорость 0, таймаут не имеет смысла
-                 inter_byte_timeout_calc = None
+            # Параметры кадрирования считаются один раз на сессию и
+            # сохраняются в settings — приемнику и будущему коду таймингов
+            # не нужно выводить их заново.
+            bits_per_char, inter_byte_timeout_calc = compute_frame_timing(settings)
 
-            # Небольшое ограничение сверху, чтобы не ждать слишком долго
-            # если скорость очень низкая (например, не более 0.5 сек)
-            if inter_byte_timeout_calc is not None and inter_byte_timeout_calc > 0.5:
-                 inter_byte_timeout_calc = 0.5
-            
             print(f"ℹ️ Рассчитанный inter_byte_timeout: {inter_byte_timeout_calc:.4f} сек" if inter_byte_timeout_calc is not None else "ℹ️ inter_byte_timeout не используется (baudrate=0)")
 
             try:
@@ -995,6 +1724,10 @@ def main():
                 )
             except serial.SerialException as e:
                 error_text = str(e)
+                # Порт не открылся — кэшированный список устройств мог
+                # устареть (устройство пропало), проверки доступности не
+                # должны отвечать по нему.
+                invalidate_ports_cache()
                 print(f"\n❌ Ошибка открытия порта {port}: {error_text}")
                 print("💡 Возможные причины:")
                 print("   - Порт используется другой программой")
@@ -1013,71 +1746,81 @@ def main():
             if not ser or not ser.is_open:
                 continue
 
+            # На Windows штатный RX-буфер драйвера (4 КиБ) копит пачки
+            # коротких кадров и отдает их одним куском. Буфер поменьше дает
+            # более ранние уведомления о приеме; кадрирование обеспечивает
+            # inter_byte_timeout. На Unix метода нет — hasattr это отсекает.
+            if hasattr(ser, 'set_buffer_size'):
+                try:
+                    ser.set_buffer_size(rx_size=1024, tx_size=1024)
+                except Exception as e:
+                    print(f"⚠️ Не удалось задать размер буферов порта: {e}")
+
             print(f"\n✅ Соединение установлено: Порт 📌: {ser.port} @ {ser.baudrate} бод @ {ser.bytesize} @ {ser.parity} @ {ser.stopbits}")
             print("\n🔄 VirtualCom готов к работе.")
 
             # Устанавливаем событие - прием разрешен по умолчанию
             processing_event.set()
             
-            # Запускаем поток приема данных, передаем событие
-            # receiver_thread = None # Убрано отсюда
-            receiver_thread = threading.Thread(target=receive_data, args=(ser, ser.port, processing_event), daemon=True)
+            # Запускаем поток приема данных, передаем событие и очередь
+            # событий: через нее приемник мгновенно сообщает UI об ошибке
+            # порта, не дожидаясь очередной проверки is_alive().
+            events_q = queue.Queue()
+            receiver_thread = threading.Thread(
+                target=receive_data,
+                args=(ser, ser.port, processing_event, events_q),
+                daemon=True,
+            )
             receiver_thread.start()
 
             try:
                 # Показываем меню первый раз
-                os.system('cls' if os.name == 'nt' else 'clear')
+                clear_screen()
                 # Определяем начальный статус
-                initial_status = "▶️ Прием команд активен." if processing_event.is_set() else "⏸ Прием команд остановлен."
+                initial_status = _STATUS_ACTIVE if processing_event.is_set() else _STATUS_PAUSED
                 show_menu(status_message=initial_status)
                 
                 while True:
                     key = None
                     choice = None
 
-                    if os.name == 'nt':
-                        if not kbhit():
-                            # Проверяем, жив ли еще поток (на случай ошибки в нем)
-                            if receiver_thread and not receiver_thread.is_alive():
-                                print("\n⚠️ Поток приема данных неожиданно завершился.")
-                                break
-                            time.sleep(0.05)
-                            continue
-
-                        key = getch()
-                        if key == b'\x03': # Ctrl+C
-                            raise KeyboardInterrupt
-                        try:
-                            choice = key.decode('ascii')
-                        except UnicodeDecodeError:
-                            choice = None
+                    # Ошибка приемника приходит через очередь событий —
+                    # реагируем сразу, не дожидаясь таймаута ожидания клавиши.
+                    try:
+                        event_kind, event_info = events_q.get_nowait()
+                    except queue.Empty:
+                        pass
                     else:
-                        # На macOS/Linux читаем меню мгновенно по одной клавише.
-                        key = getch()
-                        if key == b'\x03':
-                            raise KeyboardInterrupt
-                        # ANSI-стрелки начинаются с ESC-последовательности.
-                        # Не воспринимаем их как "Esc в меню".
-                        if key == b'\x1b':
-                            time.sleep(0.01)
-                            consumed_escape_sequence = False
-                            while kbhit():
-                                _ = getch()
-                                consumed_escape_sequence = True
-                            if consumed_escape_sequence:
-                                # Игнорируем стрелки/ANSI-последовательности в главном меню.
-                                continue
-                        try:
-                            choice = key.decode('ascii')
-                        except UnicodeDecodeError:
-                            choice = None
+                        if event_kind == "error":
+                            print(f"\n⚠️ Поток приема завершился с ошибкой: {event_info}")
+                            break
+
+                    # Платформа выбрана при импорте: на Windows ждем клавишу
+                    # из очереди насоса (по таймауту лишь проверяем живость
+                    # приемника), на macOS/Linux читаем мгновенно по одной.
+                    key, ansi_consumed = _menu_read_key()
+                    if key is None:
+                        # Проверяем, жив ли еще поток (на случай ошибки в нем)
+                        if receiver_thread and not receiver_thread.is_alive():
+                            print("\n⚠️ Поток приема данных неожиданно завершился.")
+                            break
+                        continue
+                    if ansi_consumed:
+                        # Игнорируем стрелки/ANSI-последовательности в главном меню.
+                        continue
+                    if key == b'\x03': # Ctrl+C
+                        raise KeyboardInterrupt
+                    try:
+                        choice = key.decode('ascii')
+                    except UnicodeDecodeError:
+                        choice = None
 
                     current_status_message = None # Сбрасываем статус перед обработкой
 
                     if key == b'\x1b': # Esc
                         processing_event.clear() # Останавливаем прием
-                        os.system('cls' if os.name == 'nt' else 'clear')
-                        current_status_message = "⏸ Прием команд остановлен."
+                        clear_screen()
+                        current_status_message = _STATUS_PAUSED
 
                     # Флаг, нужно ли перерисовать меню после действия
                     redisplay_menu = False
@@ -1093,24 +1836,27 @@ def main():
                         redisplay_menu = True
                     elif choice == '4': # Остановить прием
                         processing_event.clear()
-                        current_status_message = "⏸ Прием команд остановлен."
-                        redisplay_menu = True
+                        # Меняется только строка статуса — меню целиком
+                        # не перерисовываем.
+                        update_status(_STATUS_PAUSED)
                     elif choice == '5': # Продолжить прием
-                        processing_event.set() 
+                        processing_event.set()
                         if ser.is_open:
                             try:
                                 ser.reset_input_buffer() # Очищаем буфер приема
-                                current_status_message = "▶️ Прием команд возобновлен (буфер очищен)."
+                                update_status("▶️ Прием команд возобновлен (буфер очищен).")
                             except Exception as e:
+                                # print сдвинул экран — относительная позиция
+                                # статуса потеряна, перерисовываем меню.
                                 print(f"\n⚠️ Ошибка при очистке буфера: {e}")
                                 current_status_message = "▶️ Прием команд возобновлен (ошибка очистки буфера)."
+                                redisplay_menu = True
                         else:
-                            current_status_message = "▶️ Прием команд возобновлен (порт закрыт?)."
-                        redisplay_menu = True
+                            update_status("▶️ Прием команд возобновлен (порт закрыт?).")
                     elif choice == '6': # Очистить экран
-                        os.system('cls' if os.name == 'nt' else 'clear')
-                        # Статус нужно определить заново, так как экран очищен
-                        current_status_message = "▶️ Прием команд активен." if processing_event.is_set() else "⏸ Прием команд остановлен."
+                        clear_screen()
+                        # Статус определит общий блок перерисовки ниже —
+                        # processing_event опрашивается один раз на итерацию.
                         redisplay_menu = True
                     elif choice == '7': # Выход
                         print("\n👋 До свидания!")
@@ -1128,15 +1874,15 @@ def main():
                     if redisplay_menu:
                         # Определяем статус, если он еще не определен (например, после ввода данных)
                         if not current_status_message:
-                            current_status_message = "▶️ Прием команд активен." if processing_event.is_set() else "⏸ Прием команд остановлен."
+                            current_status_message = _STATUS_ACTIVE if processing_event.is_set() else _STATUS_PAUSED
                         show_menu(status_message=current_status_message)
 
                     # Проверяем, жив ли еще поток (на случай ошибки в нем)
                     if receiver_thread and not receiver_thread.is_alive():
                         print("\n⚠️ Поток приема данных неожиданно завершился.")
                         break # Выходим из внутреннего цикла, чтобы перейти к finally
-                        
-                    time.sleep(0.05)
+                    # Паузы не нужно: обе ветки выше блокируются в ожидании
+                    # клавиши (очередь насоса на Windows, raw-getch на Unix).
 
             except KeyboardInterrupt:
                 print("\n⏹ Остановка эмуляции (Ctrl+C)")
@@ -1165,7 +1911,7 @@ def main():
             # Убеждаемся, что событие установлено перед выходом/повтором
             if 'processing_event' in locals(): processing_event.set()
             safe_close_serial(ser)
-            retry = input("\nПопробовать снова? (y/n): ").lower().strip()
+            retry = console_input("\nПопробовать снова? (y/n): ").lower().strip()
             if retry != 'y':
                 sys.exit(1)
             continue